@@ -0,0 +1,120 @@
+# drugs_ui.py
+# Drug -> gene -> rsID database, effectiveness scoring and the drug-selection UI
+
+import streamlit as st
+
+from utils import GT_TRANS
+
+# ----------------------------
+# GENOMIC DRUG DATABASE (50+ drugs)
+# ----------------------------
+drug_genes = {
+    "Caffeine": {"CYP1A2": {"rs762551": {"AA": "Fast", "AC": "Medium", "CC": "Slow"}}},
+    "Ibuprofen": {"CYP2C9": {"rs1057910": {"AA": "Fast", "AC": "Normal", "CC": "Slow"}}},
+    "Paracetamol": {"UGT1A1": {"rs8175347": {"TA6TA6": "Normal", "TA6TA7": "Slow", "TA7TA7": "Very Slow"}}},
+    "Codeine": {"CYP2D6": {"rs3892097": {"GG": "Normal", "GA": "Reduced", "AA": "Poor"}}},
+    "Warfarin": {
+        "CYP2C9": {"rs1057910": {"AA": "Normal", "AC": "Intermediate", "CC": "Slow"}},
+        "VKORC1": {"rs9923231": {"GG": "Normal", "GA": "Sensitive", "AA": "Very Sensitive"}}
+    },
+    "Clopidogrel": {"CYP2C19": {"rs4244285": {"GG": "Normal", "GA": "Reduced", "AA": "Poor"}}},
+    "Metformin": {"SLC47A1": {"rs2289669": {"AA": "High Response", "AG": "Moderate", "GG": "Low"}}}
+}
+
+# Every rsID the analysis engine can look up; anything else in a file is ignored
+RELEVANT_RSIDS = frozenset(
+    rsid for genes in drug_genes.values() for snps in genes.values() for rsid in snps
+)
+
+# Flattened per-drug lookup plan, built once: (gene, rsid, variants) with the
+# variant keys normalized the same way the parsers normalize genotypes
+drug_lookup = {
+    drug: [
+        (gene, rsid, {gt.translate(GT_TRANS).upper(): status for gt, status in variations.items()})
+        for gene, snps in genes.items()
+        for rsid, variations in snps.items()
+    ]
+    for drug, genes in drug_genes.items()
+}
+
+# ----------------------------
+# EFFECTIVENESS SCORING FUNCTION
+# ----------------------------
+
+_METABOLISM_SCORE = {
+    "Fast": 90,
+    "High Response": 90,
+    "Normal": 75,
+    "Medium": 65,
+    "Reduced": 50,
+    "Intermediate": 50,
+    "Sensitive": 50,
+    "Slow": 35,
+    "Low": 35,
+    "Poor": 20,
+    "Very Slow": 15,
+    "Very Sensitive": 10,
+    "Unknown": 50
+}
+_metab_score = _METABOLISM_SCORE.get
+
+def metabolism_to_score(rate):
+    return _metab_score(rate, 50)
+
+
+# ----------------------------
+# GENOMIC ANALYSIS ENGINE
+# ----------------------------
+
+def analyze(df, drug):
+    result = {}
+
+    # Build the lookup once; reversed so the first occurrence of an rsID wins.
+    # Genotypes arrive already normalized by the parsers in utils.py
+    gt_map = dict(zip(df["rsid"].values[::-1], df["genotype"].values[::-1]))
+
+    for gene, rsid, variations in drug_lookup[drug]:
+        result[gene] = variations.get(gt_map.get(rsid), "Unknown")
+
+    final_scores = []
+    final_statuses = []
+
+    for gene, metabolism in result.items():
+        final_statuses.append(f"{gene}: {metabolism}")
+        final_scores.append(_metab_score(metabolism, 50))
+
+    return result, int(sum(final_scores) / len(final_scores))
+
+
+# ----------------------------
+# DRUG SELECTION UI
+# ----------------------------
+
+def render_drug_prediction(df):
+    st.subheader(" Search & Select Drug")
+    search = st.text_input("Search drug name")
+
+    filtered_list = [d for d in drug_genes.keys() if search.lower() in d.lower()] if search else list(drug_genes.keys())
+
+    drug = st.selectbox("Choose drug", filtered_list)
+
+    if st.button("Predict Effectiveness"):
+        metabolism_dict, effectiveness = analyze(df, drug)
+
+        st.markdown("---")
+        st.subheader(f" Prediction Output — {drug}")
+        st.write(f" **Effectiveness Score:** `{effectiveness}/100`")
+
+        if effectiveness > 80:
+            st.success(" High effectiveness expected.")
+        elif effectiveness >= 50:
+            st.warning("⚠ Moderate response expected.")
+        else:
+            st.error(" Low effectiveness predicted. Consider alternative or dosage discussion.")
+
+        st.write(" Gene Interpretation:")
+        for gene, status in metabolism_dict.items():
+            st.write(f"• **{gene} → {status}**")
+
+        st.markdown("---")
+        st.caption("⚠ Prototype — for research/demo only. Not medical advice.")
@@ -1,6 +1,21 @@
 # model.py
 # Pharmacogenomic rules and scoring logic for prototype
 
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # numba is optional; the batch kernels below then run as plain Python
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 # Mapping of rsID -> human-readable gene (for display)
 RSID_TO_GENE = {
     "rs4244285": "CYP2C19",   # *2
@@ -70,46 +85,87 @@ DRUGS = {
     }
 }
 
+# Allele whose copy number drives the phenotype call for each rsID.
+# Counting happens once per sample, so rsIDs shared by several drugs
+# (e.g. rs4244285 for Clopidogrel and Omeprazole) are only scanned once.
+_ALLELE_COUNT_TARGETS = {
+    "rs4244285": "A",   # CYP2C19 *2 loss-of-function
+    "rs12248560": "T",  # CYP2C19 *17 increased function
+    "rs1065852": "A",   # CYP2D6 reduced function
+    "rs3892097": "G",   # CYP2D6 loss (prototype assumption)
+    "rs1799853": "T",   # CYP2C9 *2 reduced function
+    "rs1057910": "C",   # CYP2C9 *3 reduced function
+    "rs887829": "T",    # UGT1A1 lower expression
+}
+
+# Drug-specific phenotype -> effectiveness score tables
+_SCORE_TABLE = {
+    # Codeine (prodrug): poor -> low effect, ultrarapid -> high risk
+    "Codeine": {"poor": 10, "intermediate": 40, "normal": 85, "rapid": 95, "ultrarapid": 99},
+    # Clopidogrel: poor -> low antiplatelet effect
+    "Clopidogrel": {"poor": 20, "intermediate": 50, "normal": 90, "rapid": 90, "ultrarapid": 90},
+    # Omeprazole: poor -> higher exposure (so "effectiveness" of acid suppression is higher)
+    "Omeprazole": {"poor": 95, "intermediate": 75, "normal": 60, "rapid": 60, "ultrarapid": 60},
+    # Ibuprofen: poor -> increased exposure (more side-effects); effectiveness roughly normal
+    "Ibuprofen": {"poor": 70, "intermediate": 80, "normal": 85},
+    # Paracetamol: poor glucuronidation -> higher toxicity risk; effectiveness near normal
+    "Paracetamol": {"poor": 60, "intermediate": 75, "normal": 88},
+}
+
+# Per-base copy numbers for every two-base genotype ("AG" -> A:1, C:0, G:1, T:0),
+# so the common case is one dict lookup instead of a str.count scan
+_BASES = "ACGT"
+_BASE_INDEX = {b: i for i, b in enumerate(_BASES)}
+_PAIR_COUNTS = {
+    a + b: tuple((a == base) + (b == base) for base in _BASES)
+    for a in _BASES for b in _BASES
+}
+_COUNT_SLOTS = tuple((r, allele, _BASE_INDEX[allele]) for r, allele in _ALLELE_COUNT_TARGETS.items())
+
+def count_alleles(snp_dict):
+    """
+    Count the phenotype-relevant allele of every scored rsID present in snp_dict.
+    returns: {rsid: count}, e.g. {'rs4244285': 1, 'rs3892097': 0}
+    """
+    counts = {}
+    for r, allele, slot in _COUNT_SLOTS:
+        gt = snp_dict.get(r)
+        if gt:
+            pair = _PAIR_COUNTS.get(gt)
+            # anything other than a plain two-base call falls back to scanning
+            counts[r] = pair[slot] if pair is not None else gt.count(allele)
+    return counts
+
 # Utilities used by the scoring logic
-def call_cyp2d6_phenotype(found):
+def call_cyp2d6_phenotype(counts):
     """
     Simple decision logic for CYP2D6 using presence of rs3892097 (loss) and rs1065852 (reduced).
-    found: dict of rs -> genotype (e.g., {'rs3892097':'GG','rs1065852':'AG'})
+    counts: dict of rs -> variant allele count (see count_alleles)
     Returns phenotype string: poor/intermediate/normal/ultrarapid
     """
     # crude rules for prototype:
-    # if rs3892097 present as variant (e.g., allele indicates loss) -> poor
-    # if rs1065852 homozygous variant -> poor, heterozygous -> intermediate
+    # if rs3892097 present as variant (G = loss, prototype assumption) -> poor
+    # if rs1065852 homozygous variant (A) -> poor, heterozygous -> intermediate
     # otherwise normal
     # Note: real-world genotyping is more complex (star alleles)
-    gt_389 = found.get("rs3892097")
-    gt_106 = found.get("rs1065852")
-    # interpret: assume for rs3892097 (G = loss) (prototype assumption)
-    if gt_389 is not None:
-        if "G" in gt_389 and gt_389.count("G") == 2:
-            return "poor"
-        if "G" in gt_389 and gt_389.count("G") == 1:
-            return "intermediate"
-    if gt_106 is not None:
-        # assume variant allele is A -> reduces function
-        if gt_106.count("A") == 2:
-            return "poor"
-        if gt_106.count("A") == 1:
-            return "intermediate"
+    c_389 = counts.get("rs3892097", 0)
+    if c_389 == 2:
+        return "poor"
+    if c_389 == 1:
+        return "intermediate"
+    c_106 = counts.get("rs1065852", 0)
+    if c_106 == 2:
+        return "poor"
+    if c_106 == 1:
+        return "intermediate"
     return "normal"
 
-def call_cyp2c19_phenotype(found):
+def call_cyp2c19_phenotype(counts):
     """
     Simple rules for CYP2C19 using rs4244285 (A = *2 loss) and rs12248560 (T = *17 increased)
     """
-    gt_2 = found.get("rs4244285")  # *2
-    gt_17 = found.get("rs12248560")  # *17
-    loss = 0
-    gain = 0
-    if gt_2:
-        loss += gt_2.count("A")  # prototype mapping
-    if gt_17:
-        gain += gt_17.count("T")
+    loss = counts.get("rs4244285", 0)
+    gain = counts.get("rs12248560", 0)
     # prioritize loss
     if loss >= 2:
         return "poor"
@@ -119,40 +175,44 @@ def call_cyp2c19_phenotype(found):
         return "rapid" if gain == 1 else "ultrarapid"
     return "normal"
 
-def call_cyp2c9_phenotype(found):
+def call_cyp2c9_phenotype(counts):
     """
     Prototype rules for CYP2C9 using rs1799853 (C>T) and rs1057910 (A>C)
     Loss alleles produce intermediate/poor
     """
-    loss_count = 0
-    gt_2 = found.get("rs1799853")
-    gt_3 = found.get("rs1057910")
-    if gt_2:
-        # assume T is variant causing reduced function
-        loss_count += gt_2.count("T")
-    if gt_3:
-        # assume C is variant causing reduced function
-        loss_count += gt_3.count("C")
+    loss_count = counts.get("rs1799853", 0) + counts.get("rs1057910", 0)
     if loss_count >= 2:
         return "poor"
     if loss_count == 1:
         return "intermediate"
     return "normal"
 
-def call_ugt1a1_phenotype(found):
+def call_ugt1a1_phenotype(counts):
     """
     Very simplified: rs887829 T allele associated with lower UGT1A1 expression (prototype)
     """
-    gt = found.get("rs887829")
-    if not gt:
-        return "normal"
-    tcount = gt.count("T")
+    tcount = counts.get("rs887829", 0)
     if tcount >= 2:
         return "poor"
     if tcount == 1:
         return "intermediate"
     return "normal"
 
+# Phenotype caller for each DRUGS "type"
+_PHENO_FUNCS = {
+    "prodrug_cytochrome2d6": call_cyp2d6_phenotype,
+    "prodrug_cytochrome2c19": call_cyp2c19_phenotype,
+    "metabolized_cytochrome2c9": call_cyp2c9_phenotype,
+    "glucuronidation_ugt1a1": call_ugt1a1_phenotype,
+}
+
+# Everything in DRUGS that does not depend on the sample, resolved once at import:
+# (drug, rsids, phenotype caller or None, score table, description)
+_DRUG_PLAN = [
+    (drug, tuple(meta["gene_rsids"]), _PHENO_FUNCS.get(meta["type"]), _SCORE_TABLE.get(drug, {}), meta["description"])
+    for drug, meta in DRUGS.items()
+]
+
 # High-level function to compute drug score
 def compute_drug_scores(snp_dict):
     """
@@ -160,70 +220,117 @@ def compute_drug_scores(snp_dict):
     returns: {drug: {score:int, phenotype:..., explanation:...}}
     """
     results = {}
-    # helper to fetch only rs relevant
-    for drug, meta in DRUGS.items():
-        rsids = meta["gene_rsids"]
-        found = {}
-        for r in rsids:
-            if r in snp_dict:
-                found[r] = snp_dict[r]
-        phenotype = "normal"
-        # call appropriate phenotype function
-        typ = meta["type"]
-        if typ == "prodrug_cytochrome2d6":
-            phenotype = call_cyp2d6_phenotype(found)
-            # For codeine (prodrug), poor -> low effect, ultrarapid -> high risk
-            if phenotype == "poor":
-                score = 10
-            elif phenotype == "intermediate":
-                score = 40
-            elif phenotype == "normal":
-                score = 85
-            elif phenotype == "rapid":
-                score = 95
-            else:
-                score = 99
-        elif typ == "prodrug_cytochrome2c19":
-            phenotype = call_cyp2c19_phenotype(found)
-            # For clopidogrel specifically: poor -> low effect
-            if drug == "Clopidogrel":
-                if phenotype == "poor":
-                    score = 20
-                elif phenotype == "intermediate":
-                    score = 50
-                elif phenotype in ("rapid","ultrarapid"):
-                    score = 90
-                else:
-                    score = 90
-            else:
-                # omeprazole: poor -> higher exposure (so "effectiveness" of acid suppression is higher)
-                if phenotype == "poor":
-                    score = 95
-                elif phenotype == "intermediate":
-                    score = 75
-                else:
-                    score = 60
-        elif typ == "metabolized_cytochrome2c9":
-            phenotype = call_cyp2c9_phenotype(found)
-            # for ibuprofen: poor -> increased exposure (so more side-effects); we'll map to "effectiveness" roughly normal
-            if phenotype == "poor":
-                score = 70
-            elif phenotype == "intermediate":
-                score = 80
-            else:
-                score = 85
-        elif typ == "glucuronidation_ugt1a1":
-            phenotype = call_ugt1a1_phenotype(found)
-            # for paracetamol: poor glucuronidation -> perhaps higher toxicity risk; keep effectiveness near normal
-            if phenotype == "poor":
-                score = 60
-            elif phenotype == "intermediate":
-                score = 75
-            else:
-                score = 88
-        else:
-            phenotype = "unknown"
-            score = 50
-        explanation = f"{meta['description']} Detected genotype markers: {found if found else 'none found in file.'} => phenotype: {phenotype}."
+    counts = count_alleles(snp_dict)
+    for drug, rsids, call_phenotype, scores, description in _DRUG_PLAN:
+        # only the rs relevant to this drug, for the explanation text
+        found = {r: snp_dict[r] for r in rsids if r in snp_dict}
+        phenotype = call_phenotype(counts) if call_phenotype else "unknown"
+        score = scores.get(phenotype, 50)
+        explanation = f"{description} Detected genotype markers: {found if found else 'none found in file.'} => phenotype: {phenotype}."
         results[drug] = {"score": score, "phenotype": phenotype, "explanation": explanation}
     return results
+
+
+# ----------------------------
+# BATCH SCORING (many samples)
+# ----------------------------
+# Each sample is encoded as a fixed int8 vector of variant allele counts, one
+# slot per entry of _FIXED_ALLELE_TARGETS, and scored by a numba kernel.
+_FIXED_ALLELE_TARGETS = tuple(_ALLELE_COUNT_TARGETS.items())
+# Slot of each rsID in the encoded vector; numba freezes these ints at compile
+# time, so the kernel stays correct if _ALLELE_COUNT_TARGETS is reordered
+_SLOT = {r: i for i, (r, _) in enumerate(_FIXED_ALLELE_TARGETS)}
+_S_RS4244285 = _SLOT["rs4244285"]
+_S_RS12248560 = _SLOT["rs12248560"]
+_S_RS1065852 = _SLOT["rs1065852"]
+_S_RS3892097 = _SLOT["rs3892097"]
+_S_RS1799853 = _SLOT["rs1799853"]
+_S_RS1057910 = _SLOT["rs1057910"]
+_S_RS887829 = _SLOT["rs887829"]
+_PHENOTYPES = ("poor", "intermediate", "normal", "rapid", "ultrarapid")
+_GENE_OF_TYPE = {
+    "prodrug_cytochrome2d6": 0,
+    "prodrug_cytochrome2c19": 1,
+    "metabolized_cytochrome2c9": 2,
+    "glucuronidation_ugt1a1": 3,
+}
+
+BATCH_DRUGS = tuple(DRUGS)
+# Gene caller index per drug (-1 = unknown type, always scores 50)
+_DRUG_GENE = np.array([_GENE_OF_TYPE.get(DRUGS[d]["type"], -1) for d in BATCH_DRUGS], dtype=np.int8)
+# Score per (drug, phenotype code), defaulting to 50 like compute_drug_scores
+_SCORE_MATRIX = np.array(
+    [[_SCORE_TABLE.get(d, {}).get(p, 50) for p in _PHENOTYPES] for d in BATCH_DRUGS],
+    dtype=np.int16,
+)
+
+@njit(cache=True)
+def _score(arr, drug_gene, score_matrix):
+    # phenotype codes: 0 poor, 1 intermediate, 2 normal, 3 rapid, 4 ultrarapid
+    genes = np.empty(4, dtype=np.int8)
+    # CYP2D6
+    c_389 = arr[_S_RS3892097]
+    c_106 = arr[_S_RS1065852]
+    if c_389 == 2 or (c_389 != 1 and c_106 == 2):
+        genes[0] = 0
+    elif c_389 == 1 or c_106 == 1:
+        genes[0] = 1
+    else:
+        genes[0] = 2
+    # CYP2C19
+    loss = arr[_S_RS4244285]
+    gain = arr[_S_RS12248560]
+    if loss >= 2:
+        genes[1] = 0
+    elif loss == 1:
+        genes[1] = 1
+    elif gain == 1:
+        genes[1] = 3
+    elif gain >= 2:
+        genes[1] = 4
+    else:
+        genes[1] = 2
+    # CYP2C9
+    loss = arr[_S_RS1799853] + arr[_S_RS1057910]
+    genes[2] = 0 if loss >= 2 else (1 if loss == 1 else 2)
+    # UGT1A1
+    tcount = arr[_S_RS887829]
+    genes[3] = 0 if tcount >= 2 else (1 if tcount == 1 else 2)
+
+    out = np.empty(drug_gene.shape[0], dtype=np.int16)
+    for i in range(drug_gene.shape[0]):
+        g = drug_gene[i]
+        out[i] = 50 if g < 0 else score_matrix[i, genes[g]]
+    return out
+
+@njit(parallel=True, cache=True)
+def _score_batch(arr2d, drug_gene, score_matrix):
+    out = np.empty((arr2d.shape[0], drug_gene.shape[0]), dtype=np.int16)
+    for i in prange(arr2d.shape[0]):
+        out[i] = _score(arr2d[i], drug_gene, score_matrix)
+    return out
+
+def encode_sample(snp_dict):
+    """
+    snp_dict: {rsid: genotype_string}
+    returns: np.int8 array of variant allele counts in _FIXED_ALLELE_TARGETS order
+    """
+    counts = count_alleles(snp_dict)
+    # The callers only distinguish 0, 1, 2 and "more", so clamping to 3 keeps
+    # every branch identical while fitting arbitrary genotype strings in int8
+    return np.array([min(counts.get(r, 0), 3) for r, _ in _FIXED_ALLELE_TARGETS], dtype=np.int8)
+
+def score_samples(snp_dicts):
+    """
+    Score many samples at once (same scores as compute_drug_scores, no explanations).
+    snp_dicts: iterable of {rsid: genotype_string}
+    returns: np.int16 array of shape (n_samples, len(BATCH_DRUGS))
+    """
+    encoded = [encode_sample(d) for d in snp_dicts]
+    if not encoded:
+        return np.empty((0, len(BATCH_DRUGS)), dtype=np.int16)
+    return _score_batch(np.stack(encoded), _DRUG_GENE, _SCORE_MATRIX)
+
+# Pay the JIT compile cost at import rather than on the first request
+if NUMBA_AVAILABLE:
+    _score_batch(np.zeros((1, len(_FIXED_ALLELE_TARGETS)), dtype=np.int8), _DRUG_GENE, _SCORE_MATRIX)
@@ -0,0 +1,179 @@
+# test_parity.py
+# Parity checks for the optimized scoring and parsing paths:
+# - compute_drug_scores against the original str.count / if-elif rules
+# - score_samples (numba batch kernel) against compute_drug_scores
+# - every installed CSV / VCF backend in utils against the pandas fallback
+
+import gzip
+import io
+import random
+
+import pandas as pd
+import pytest
+
+import model
+import utils
+
+SCORED_RSIDS = list(model.RSID_TO_GENE)
+GENOTYPES = ["", "AA", "AG", "GA", "GG", "CT", "TT", "CC", "AC", "A/G", "T|T", "G", "ACGT", "A" * 130]
+
+
+def reference_scores(snp_dict):
+    # The original rule set, kept verbatim in spirit: per-drug str.count calls
+    # and if/elif score trees
+    def cyp2d6(found):
+        gt_389 = found.get("rs3892097")
+        gt_106 = found.get("rs1065852")
+        if gt_389 is not None:
+            if gt_389.count("G") == 2:
+                return "poor"
+            if gt_389.count("G") == 1:
+                return "intermediate"
+        if gt_106 is not None:
+            if gt_106.count("A") == 2:
+                return "poor"
+            if gt_106.count("A") == 1:
+                return "intermediate"
+        return "normal"
+
+    def cyp2c19(found):
+        loss = found["rs4244285"].count("A") if found.get("rs4244285") else 0
+        gain = found["rs12248560"].count("T") if found.get("rs12248560") else 0
+        if loss >= 2:
+            return "poor"
+        if loss == 1:
+            return "intermediate"
+        if gain >= 1:
+            return "rapid" if gain == 1 else "ultrarapid"
+        return "normal"
+
+    def cyp2c9(found):
+        loss = found["rs1799853"].count("T") if found.get("rs1799853") else 0
+        loss += found["rs1057910"].count("C") if found.get("rs1057910") else 0
+        return "poor" if loss >= 2 else "intermediate" if loss == 1 else "normal"
+
+    def ugt1a1(found):
+        t = found["rs887829"].count("T") if found.get("rs887829") else 0
+        return "poor" if t >= 2 else "intermediate" if t == 1 else "normal"
+
+    results = {}
+    for drug, meta in model.DRUGS.items():
+        found = {r: snp_dict[r] for r in meta["gene_rsids"] if r in snp_dict}
+        typ = meta["type"]
+        if typ == "prodrug_cytochrome2d6":
+            phenotype = cyp2d6(found)
+            score = {"poor": 10, "intermediate": 40, "normal": 85, "rapid": 95}.get(phenotype, 99)
+        elif typ == "prodrug_cytochrome2c19":
+            phenotype = cyp2c19(found)
+            if drug == "Clopidogrel":
+                score = {"poor": 20, "intermediate": 50}.get(phenotype, 90)
+            else:
+                score = {"poor": 95, "intermediate": 75}.get(phenotype, 60)
+        elif typ == "metabolized_cytochrome2c9":
+            phenotype = cyp2c9(found)
+            score = {"poor": 70, "intermediate": 80}.get(phenotype, 85)
+        else:
+            phenotype = ugt1a1(found)
+            score = {"poor": 60, "intermediate": 75}.get(phenotype, 88)
+        explanation = f"{meta['description']} Detected genotype markers: {found if found else 'none found in file.'} => phenotype: {phenotype}."
+        results[drug] = {"score": score, "phenotype": phenotype, "explanation": explanation}
+    return results
+
+
+def random_samples(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        {r: rng.choice(GENOTYPES) for r in SCORED_RSIDS if rng.random() < 0.8}
+        for _ in range(n)
+    ]
+
+
+def test_compute_drug_scores_matches_reference():
+    for sample in random_samples(20_000):
+        assert model.compute_drug_scores(sample) == reference_scores(sample), sample
+
+
+def test_score_samples_matches_compute_drug_scores():
+    samples = random_samples(5_000, seed=1)
+    batch = model.score_samples(samples)
+    assert batch.shape == (len(samples), len(model.BATCH_DRUGS))
+    for sample, row in zip(samples, batch):
+        expected = model.compute_drug_scores(sample)
+        assert [expected[d]["score"] for d in model.BATCH_DRUGS] == list(row), sample
+
+
+def test_score_samples_empty():
+    assert model.score_samples([]).shape == (0, len(model.BATCH_DRUGS))
+
+
+# ----------------------------
+# PARSER BACKENDS
+# ----------------------------
+
+RSIDS = frozenset({"rs4244285", "rs762551", "rs3892097"})
+
+CSV_INPUTS = [
+    b"rsid,chromosome,position,genotype\n rs4244285 ,10,1,a/g\nrs762551,15,2,\nrs1,1,1,AA\nrs3892097,1,1,G A\n",
+    b"rsid\tchromosome\tposition\tgenotype\nrs4244285\t10\t1\tG|A\nrs99\t1\t1\tCC\nrs762551\t15\t2\tac\n",
+]
+
+
+def csv_backends():
+    backends = [("pandas", None, None)]
+    if utils.pa is not None:
+        backends.append(("pyarrow", None, utils.pa))
+    if utils.pl is not None:
+        backends.append(("polars", utils.pl, utils.pa))
+    return backends
+
+
+@pytest.mark.parametrize("raw", CSV_INPUTS)
+def test_csv_backends_match_pandas(raw, monkeypatch):
+    frames = {}
+    for name, pl, pa in csv_backends():
+        monkeypatch.setattr(utils, "pl", pl)
+        monkeypatch.setattr(utils, "pa", pa)
+        frames[name] = utils.parse_csv(io.BytesIO(raw), RSIDS)
+    for name, df in frames.items():
+        pd.testing.assert_frame_equal(df, frames["pandas"], obj=name)
+    assert set(frames["pandas"]["rsid"]) <= RSIDS
+
+
+def vcf_bytes():
+    rng = random.Random(2)
+    rsids = sorted(RSIDS)
+    lines = ["##fileformat=VCFv4.2", "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tS1"]
+    for i in range(20_000):
+        roll = rng.random()
+        if roll < 0.001:
+            rid = rng.choice(rsids)
+        elif roll < 0.1:
+            rid = rng.choice(rsids) + "1"  # substring hit that must be rejected
+        else:
+            rid = f"rs{rng.randint(1, 10 ** 8)}"
+        lines.append(f"{rng.choice(['1', 'chré'])}\t{i}\t{rid}\t{rng.choice('acgt')}\t{rng.choice('ACGT.')}"
+                     f"\t.\tPASS\tX={rng.choice(rsids)}\tGT\t0/1")
+    lines.append("1\t5\trs762551\tA")  # short record, skipped by every path
+    return "\n".join(lines).encode()
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_vcf_prescan_matches_pandas(compress, monkeypatch):
+    if utils.ahocorasick is None:
+        pytest.skip("pyahocorasick not installed")
+    raw = vcf_bytes()
+    if compress:
+        raw = gzip.compress(raw)
+    monkeypatch.setattr(utils, "VCF_SCAN_BLOCK", 4096)  # force lines across block edges
+    prescan = utils.parse_vcf(io.BytesIO(raw), RSIDS)
+    monkeypatch.setattr(utils, "ahocorasick", None)
+    fallback = utils.parse_vcf(io.BytesIO(raw), RSIDS)
+    pd.testing.assert_frame_equal(prescan, fallback)
+    assert len(fallback) and fallback["rsid"].is_unique
+
+
+def test_parse_vcf_accepts_any_iterable():
+    raw = vcf_bytes()
+    expected = utils.parse_vcf(io.BytesIO(raw), RSIDS)
+    for rsids in (set(RSIDS), sorted(RSIDS), tuple(RSIDS) * 2):
+        pd.testing.assert_frame_equal(utils.parse_vcf(io.BytesIO(raw), rsids), expected)
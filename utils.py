@@ -0,0 +1,200 @@
+# utils.py
+# Genome file parsers (CSV / 23andMe-style dumps and VCF) for the prototype.
+# Every parser takes the set of rsIDs the caller scores and drops all other
+# rows as early as possible; all return a dataframe with rsid/genotype columns.
+
+import functools
+import gzip
+
+import pandas as pd
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = None
+
+# Genotypes are normalized once here ("a/g", "A|G", "A G" -> "AG") so the
+# analysis code can use them as-is
+GT_TRANS = str.maketrans("", "", "/| ")
+
+# ----------------------------
+# CSV PARSER
+# ----------------------------
+
+CSV_COLUMNS = ["rsid", "genotype"]
+
+
+def read_csv_arrow(file, sep):
+    # Multithreaded Arrow reader; only the two columns analyze needs are kept
+    table = pa_csv.read_csv(
+        file,
+        read_options=pa_csv.ReadOptions(block_size=16 << 20),
+        parse_options=pa_csv.ParseOptions(delimiter=sep),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={col: pa.string() for col in CSV_COLUMNS},
+            include_columns=CSV_COLUMNS,
+            strings_can_be_null=True,
+        ),
+    )
+    return pd.DataFrame({col: table.column(col).to_numpy(zero_copy_only=False) for col in CSV_COLUMNS})
+
+
+def read_csv_polars(file, sep, rsids):
+    # Lazy scan: only the rsid/genotype columns are read. The filter runs on
+    # the stripped rsid, so it is applied after the scan rather than pushed
+    # into it; genotype cleanup then only touches the matching rows
+    df = (
+        pl.scan_csv(file, separator=sep, infer_schema_length=0)
+        .select(CSV_COLUMNS)
+        .with_columns(pl.col("rsid").str.strip_chars())
+        .filter(pl.col("rsid").is_in(list(rsids)))
+        # normalize genotypes only on the handful of rows that survive
+        .with_columns(pl.col("genotype").str.replace_all(r"[/| ]", "").str.to_uppercase())
+        .collect()
+    )
+    return pd.DataFrame({col: df[col].to_list() for col in CSV_COLUMNS})
+
+
+def parse_csv(file, rsids):
+    # Raw genotype dumps (e.g. 23andMe) are tab-separated; pick the delimiter
+    # from the header line so the C engine can be used instead of sniffing
+    header = file.readline()
+    file.seek(0)
+    sep = "\t" if b"\t" in header else ","
+    if pl is not None:
+        return read_csv_polars(file, sep, rsids)
+    if pa is not None:
+        df = read_csv_arrow(file, sep)
+    else:
+        df = pd.read_csv(file, sep=sep, usecols=CSV_COLUMNS, dtype=str, engine="c")
+    df["rsid"] = df["rsid"].str.strip()
+    df = df[df["rsid"].isin(rsids)].reset_index(drop=True)
+    df["genotype"] = df["genotype"].str.translate(GT_TRANS).str.upper()
+    return df
+
+
+# ----------------------------
+# VCF PARSER
+# ----------------------------
+
+VCF_COLUMNS = ["chrom", "position", "rsid", "ref", "alt"]
+VCF_CHUNKSIZE = 200_000
+VCF_SCAN_BLOCK = 1 << 20
+# CHROM, POS, ID, REF, ALT are always the first five columns of a VCF record
+VCF_FIXED_FIELDS = len(VCF_COLUMNS)
+
+
+@functools.lru_cache(maxsize=None)
+def rsid_automaton(rsids):
+    # Multi-string matcher over the scored rsIDs, used to find candidate lines
+    # in the raw upload without splitting every record
+    automaton = ahocorasick.Automaton()
+    for rsid in rsids:
+        automaton.add_word(rsid, rsid)
+    automaton.make_automaton()
+    return automaton
+
+
+def scan_vcf_block(text, rsids, lines):
+    # Collect the lines containing a scored rsID; nothing else is split
+    starts = set()
+    for end, _ in rsid_automaton(frozenset(rsids)).iter(text):
+        start = text.rfind("\n", 0, end) + 1
+        if start in starts:
+            continue
+        starts.add(start)
+        stop = text.find("\n", end)
+        lines.append(text[start:stop if stop != -1 else len(text)])
+
+
+def add_vcf_lines(lines, rsids, records):
+    # Decode all candidate lines as UTF-8 in one call rather than per line;
+    # strict, so invalid bytes raise just as they do in the pandas reader
+    text = "\n".join(lines).encode("latin-1").decode("utf-8")
+    for line in text.split("\n"):
+        if line.startswith("#"):
+            continue
+        # Stop splitting after the fixed fields; QUAL..samples stay one string
+        parts = line.rstrip("\r").split("\t", VCF_FIXED_FIELDS)
+        if len(parts) < VCF_FIXED_FIELDS or parts[2] not in rsids or not all(parts[:VCF_FIXED_FIELDS]):
+            continue
+        chrom, pos, rsid, ref, alt = parts[:VCF_FIXED_FIELDS]
+        if rsid not in records:
+            # REF+ALT never carries allele separators; only case needs fixing
+            records[rsid] = [rsid, chrom, pos, (ref + alt).upper()]
+
+
+def parse_vcf_prescan(file, rsids):
+    file.seek(0)
+    stream = gzip.GzipFile(fileobj=file) if file.read(2) == b"\x1f\x8b" else file
+    file.seek(0)
+    records = {}
+    tail = b""
+    while len(records) < len(rsids):
+        block = stream.read(VCF_SCAN_BLOCK)
+        if not block:
+            if tail:
+                lines = []
+                scan_vcf_block(tail.decode("latin-1"), rsids, lines)
+                add_vcf_lines(lines, rsids, records)
+            break
+        buf = tail + block
+        cut = buf.rfind(b"\n") + 1
+        tail = buf[cut:]
+        lines = []
+        # latin-1 maps bytes 1:1 onto code points, so this is a plain copy
+        scan_vcf_block(buf[:cut].decode("latin-1"), rsids, lines)
+        if lines:
+            add_vcf_lines(lines, rsids, records)
+    return pd.DataFrame(list(records.values()), columns=["rsid", "chrom", "position", "genotype"])
+
+
+def parse_vcf(file, rsids):
+    # Every path keeps the first record per rsID (what analyze uses) and
+    # stops reading once each whitelisted rsID has been seen
+    rsids = frozenset(rsids)
+    if ahocorasick is not None:
+        return parse_vcf_prescan(file, rsids)
+
+    # Stream the five fixed columns in chunks so a large VCF never sits in
+    # memory at once; rows for rsIDs we don't score are dropped per chunk
+    # Sniff gzip from the magic bytes like the prescan path; an upload's name
+    # need not end in .gz and "infer" can't see through a BytesIO
+    file.seek(0)
+    compression = "gzip" if file.read(2) == b"\x1f\x8b" else None
+    file.seek(0)
+    reader = pd.read_csv(
+        file,
+        sep="\t",
+        comment="#",
+        header=None,
+        names=VCF_COLUMNS,
+        usecols=range(VCF_FIXED_FIELDS),
+        dtype=str,
+        engine="c",
+        compression=compression,
+        chunksize=VCF_CHUNKSIZE,
+    )
+    chunks = []
+    seen = set()
+    for chunk in reader:
+        chunk = chunk[chunk["rsid"].isin(rsids)].dropna()
+        chunks.append(chunk)
+        seen.update(chunk["rsid"])
+        if len(seen) == len(rsids):
+            break
+    df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=VCF_COLUMNS)
+    df = df.drop_duplicates("rsid").reset_index(drop=True)
+    df["genotype"] = (df["ref"] + df["alt"]).str.upper()
+    return df[["rsid", "chrom", "position", "genotype"]]